@@ -2,12 +2,20 @@ from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from typing import List
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 import ncs
+import _ncs
+import asyncio
+import atexit
 import logging
 import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-from tools import SyncResult, DeviceInfo, build_device_info
+from tools import SyncResult, DeviceInfo, DEVICE_INFO_SELECT, build_device_info, build_device_info_from_row, iter_query_rows, strip_prefix, ttl_cache, xpath_contains_lower
 
 
 class Configuration:
@@ -20,29 +28,110 @@ class Configuration:
         self.load_env()
         self.nso_user = os.getenv("NSO_USER", 'nsoadmin')
         self.nso_context = os.getenv("NSO_CONTEXT", 'system')
-        self.api_port = os.getenv("API_PORT", 8000)
+        self.api_port = int(os.getenv("API_PORT", "8000"))
         self.logdir = os.getenv("LOG_DIRECTORY", "/var/log/ncs")
+        self.logpath = os.path.join(self.logdir, "ncs-python-mcp-server.log")
+        self.log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.log_max_bytes = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+        self.log_backup_count = int(os.getenv("LOG_BACKUP_COUNT", 5))
         self.nso_addresss = os.getenv("NSO_ADDRESS", "127.0.0.1")
+        self.write_workers = int(os.getenv("WRITE_WORKERS", 2))
+        self.cache_ttl = float(os.getenv("CACHE_TTL", 30))
+
+        # Each worker thread gets its own MAAPI socket and user session, opened on first use
+        self._local = threading.local()
+        self._sessions_lock = threading.Lock()
+        self._sessions = set()
 
 
     @staticmethod
     def load_env() -> None:
         load_dotenv()
 
+    def _get_maapi(self) -> ncs.maapi.Maapi:
+        """Return the calling thread's MAAPI socket, opening it and its user session if needed."""
+        maapi = getattr(self._local, "maapi", None)
+        if maapi is None:
+            exit_stack = ExitStack()
+            try:
+                maapi = exit_stack.enter_context(ncs.maapi.Maapi(ip=self.nso_addresss))
+                exit_stack.enter_context(ncs.maapi.Session(maapi, self.nso_user, self.nso_context))
+            except BaseException:
+                exit_stack.close()
+                raise
+
+            self._local.exit_stack, self._local.maapi = exit_stack, maapi
+            with self._sessions_lock:
+                self._sessions.add(exit_stack)
+
+        return maapi
+
+    def _close_thread_session(self) -> None:
+        """Close the calling thread's MAAPI session and socket."""
+        exit_stack = getattr(self._local, "exit_stack", None)
+        self._local.exit_stack, self._local.maapi = None, None
+        if exit_stack is not None:
+            with self._sessions_lock:
+                self._sessions.discard(exit_stack)
+            self._close_session(exit_stack)
+
+    @staticmethod
+    def _close_session(exit_stack: ExitStack) -> None:
+        try:
+            exit_stack.close()
+        except (_ncs.error.EOF, _ncs.error.Error):
+            pass
+
+    @contextmanager
+    def _trans(self, readwrite: int):
+        """Start a transaction, reopening the thread's MAAPI session once if NSO dropped it."""
+        try:
+            trans = self._get_maapi().start_trans(readwrite)
+        except (_ncs.error.EOF, _ncs.error.Error):
+            self._close_thread_session()
+            trans = self._get_maapi().start_trans(readwrite)
+
+        with trans:
+            yield trans
+
+    def read_trans(self):
+        """Start a read transaction on the thread's MAAPI session and finish it on exit."""
+        return self._trans(ncs.READ)
+
+    def write_trans(self):
+        """Start a write transaction on the thread's MAAPI session and finish it on exit."""
+        return self._trans(ncs.READ_WRITE)
+
+    def close(self) -> None:
+        """Close the MAAPI sessions and sockets of all threads."""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, set()
+
+        for exit_stack in sessions:
+            self._close_session(exit_stack)
+
 
 config = Configuration()
 
-# Setup logger
-logname = os.path.join(config.logdir, "ncs-python-mcp-server.log")
+class PrivateRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that keeps the log file readable by its owner only, also after rollover."""
 
-open(logname, 'a').close()
-os.chmod(logname, 0o600) 
+    def _open(self):
+        stream = super()._open()
+        os.chmod(self.baseFilename, 0o600)
+        return stream
 
-logging.basicConfig(filename=logname,
-                    filemode='a+',
-                    format='%(asctime)s.%(msecs)02d %(filename)s:%(lineno)s %(levelname)s: %(message)s',
-                    datefmt='%d/%m/%Y %H:%M:%S',
-                    level=logging.DEBUG)
+
+# Setup logger, file writes are done by a background listener thread
+log_handler = PrivateRotatingFileHandler(config.logpath, maxBytes=config.log_max_bytes, backupCount=config.log_backup_count)
+log_handler.setFormatter(logging.Formatter(fmt='%(asctime)s.%(msecs)02d %(filename)s:%(lineno)s %(levelname)s: %(message)s',
+                                           datefmt='%d/%m/%Y %H:%M:%S'))
+
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, log_handler)
+logging.basicConfig(handlers=[QueueHandler(log_queue)], level=config.log_level)
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
@@ -54,6 +143,23 @@ mcp = FastMCP(
     stateless_http=True,
 )
 
+# NED ids that are built into NSO and not used to manage devices
+EXCLUDED_NEDS = frozenset({'ned:lsa-netconf', 'ned:netconf', 'ned:snmp'})
+
+# Marker in the service type name of day1 services
+DAY1_TEMPLATE = "-day1-"
+
+# Blocking MAAPI calls run in worker threads, each with its own MAAPI session;
+# write transactions get their own smaller pool
+write_executor = ThreadPoolExecutor(max_workers=config.write_workers, thread_name_prefix="nso-write")
+
+@ttl_cache(config.cache_ttl)
+def _sync_get_neds_list() -> list[str]:
+    logger.info("Getting NEDs list")
+    with config.read_trans() as read_trans:
+        rows = iter_query_rows(read_trans, "/ncs:devices/ned-ids/ned-id", ["id"])
+        return [strip_prefix(ned_id) for (ned_id,) in rows if ned_id not in EXCLUDED_NEDS]
+
 @mcp.tool()
 async def get_neds_list() -> list[str]:
     """
@@ -62,21 +168,13 @@ async def get_neds_list() -> list[str]:
     Returns:
         list[str]: A list of NEDs from the NSO server.
     """
-    logger.info(f"Getting NEDs list")
-    neds_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        for ned in root.ncs__devices.ned_ids.ned_id:
-            if ned.id in ['ned:lsa-netconf', 'ned:netconf', 'ned:snmp']:
-                continue
+    return await asyncio.to_thread(_sync_get_neds_list)
 
-            if len(ned.id.split(':')) == 2:
-                neds_list.append(ned.id.split(':')[1])
-            else:
-                neds_list.append(ned.id)
-
-    return neds_list
+@ttl_cache(config.cache_ttl)
+def _sync_get_devices_name_list() -> list[str]:
+    logger.info("Getting devices name list")
+    with config.read_trans() as read_trans:
+        return [name for (name,) in iter_query_rows(read_trans, "/ncs:devices/device", ["name"])]
 
 @mcp.tool()
 async def get_devices_name_list() -> list[str]:
@@ -86,15 +184,13 @@ async def get_devices_name_list() -> list[str]:
     Returns:
         list[str]: A list of network devices from the NSO server.
     """
-    logger.info(f"Getting devices name list")
-    devices_name_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        for device in root.devices.device:
-            devices_name_list.append(device.name)
-    
-    return devices_name_list
+    return await asyncio.to_thread(_sync_get_devices_name_list)
+
+@ttl_cache(config.cache_ttl)
+def _sync_get_devices_groups_list() -> list[str]:
+    logger.info("Getting devices name list")
+    with config.read_trans() as read_trans:
+        return [name for (name,) in iter_query_rows(read_trans, "/ncs:devices/device-group", ["name"])]
 
 @mcp.tool()
 async def get_devices_groups_list() -> list[str]:
@@ -104,15 +200,21 @@ async def get_devices_groups_list() -> list[str]:
     Returns:
         list[str]: A list of device groups from the NSO server.
     """
-    logger.info(f"Getting devices name list")
-    device_group_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
+    return await asyncio.to_thread(_sync_get_devices_groups_list)
+
+def _sync_get_device_info(device_name: str) -> DeviceInfo:
+    clean_name = device_name.strip()
+    logger.info("Getting device info for %s", clean_name)
+    with config.read_trans() as read_trans:
         root = ncs.maagic.get_root(read_trans)
-        
-        for group in root.devices.device_group:
-            device_group_list.append(group.name)
-    
-    return device_group_list
+
+        try:
+            device = root.ncs__devices.device[clean_name]
+        except KeyError:
+            logger.info("Device %s not found", clean_name)
+            raise ValueError(f"Device {clean_name} not found in NSO CDB")
+
+        return build_device_info(device)
 
 @mcp.tool()
 async def get_device_info(device_name: str) -> DeviceInfo:
@@ -125,18 +227,16 @@ async def get_device_info(device_name: str) -> DeviceInfo:
     Returns:
         DeviceInfo: device information from NSO CDBa
     """
-    logger.info(f"Getting device info for {device_name.strip()}")
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
+    return await asyncio.to_thread(_sync_get_device_info, device_name)
+
+def _sync_check_sync_devices_status(device_name: str) -> str:
+    clean_name = device_name.strip()
+    logger.info("Check sync status for device %s", clean_name)
+    with config.read_trans() as read_trans:
         root = ncs.maagic.get_root(read_trans)
-                
-        if root.devices.device.exists(device_name.strip()):
-            device = root.ncs__devices.device[device_name.strip()]
-            result = build_device_info(device)
-        else:
-            logger.info(f"Device {device_name.strip()} not found")
-            raise ValueError(f"Device {device_name.strip()} not found in NSO CDB")
+        result = root.ncs__devices.device[clean_name].check_sync()
 
-        return result
+        return str(result.ncs__result)
 
 @mcp.tool()
 async def check_sync_devices_status(device_name: str) -> str:
@@ -149,12 +249,22 @@ async def check_sync_devices_status(device_name: str) -> str:
     Returns:
         str: in-sync if configuration is in sync, out-of-sync if configuration is not in sync, unsupported if the device doesn't support the function
     """
-    logger.info(f"Check sync status for device {device_name.strip()}")
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        result = root.ncs__devices.device[device_name.strip()].check_sync()
+    return await asyncio.to_thread(_sync_check_sync_devices_status, device_name)
 
-        return str(result.ncs__result)
+def _sync_sync_device(device_name: str) -> SyncResult:
+    clean_name = device_name.strip()
+    logger.info("Syncing configuration for device %s", clean_name)
+    with config.write_trans() as trans:
+        root = ncs.maagic.get_root(trans)
+
+        try:
+            device = root.ncs__devices.device[clean_name]
+        except KeyError:
+            raise ValueError(f"Device {clean_name} not found in NSO CDB")
+
+        result = device.sync_from()
+
+        return SyncResult.model_construct(name=clean_name, result=str(result.ncs__result))
 
 @mcp.tool()
 async def sync_device(device_name: str) -> SyncResult:
@@ -167,14 +277,26 @@ async def sync_device(device_name: str) -> SyncResult:
     Returns:
         str: true if sync was performed successfuly, and false otherwise
     """
-    logger.info(f"Syncing configuration for device {device_name.strip()}")
-    with ncs.maapi.Maapi(ip=config.nso_addresss) as m:
-        with ncs.maapi.Session(m, config.nso_user, config.nso_context):
-            with m.start_write_trans() as trans:
-                root = ncs.maagic.get_root(trans)
-                result = root.ncs__devices.device[device_name.strip()].sync_from()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(write_executor, _sync_sync_device, device_name)
+
+def _sync_sync_device_group(device_group_name: str) -> List[SyncResult]:
+    clean_group_name = device_group_name.strip()
+    logger.info("Syncing configuration for device group %s", clean_group_name)
+    with config.write_trans() as trans:
+        root = ncs.maagic.get_root(trans)
 
-                return SyncResult(name=device_name.strip(), result=str(result.ncs__result))
+        try:
+            device_group = root.ncs__devices.device_group[clean_group_name]
+        except KeyError:
+            raise ValueError(f"The device group {clean_group_name} could not be found in NSO CDB")
+
+        result = device_group.sync_from()
+
+        # Only copy the raw values while the write transaction is open
+        raw_results = [(item_result.device, str(item_result.result)) for item_result in result.sync_result]
+
+    return [SyncResult.model_construct(name=name, result=sync_result) for name, sync_result in raw_results]
 
 @mcp.tool()
 async def sync_device_group(device_group_name: str) -> List[SyncResult]:
@@ -187,23 +309,21 @@ async def sync_device_group(device_group_name: str) -> List[SyncResult]:
     Returns:
         str: true if sync was performed successfuly, and false otherwise
     """
-    logger.info(f"Syncing configuration for device group {device_group_name.strip()}")
-    result_list = []
-    with ncs.maapi.Maapi(ip=config.nso_addresss) as m:
-        with ncs.maapi.Session(m, config.nso_user, config.nso_context):
-            with m.start_write_trans() as trans:
-                root = ncs.maagic.get_root(trans)
-
-                if not root.ncs__devices.device_group.exists(device_group_name.strip()):
-                    raise ValueError(f"The device group {device_group_name.strip()} could not be found in NSO CDB")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(write_executor, _sync_sync_device_group, device_group_name)
 
-                result = root.ncs__devices.device_group[device_group_name.strip()].sync_from()
+def _sync_get_devices_from_device_group(device_group_name: str) -> list[str]:
+    clean_group_name = device_group_name.strip()
+    logger.info("Getting devices list from device group %s", clean_group_name)
+    with config.read_trans() as read_trans:
+        root = ncs.maagic.get_root(read_trans)
 
-                for item_result in result.sync_result:
-                    sync_result = SyncResult(name=item_result.device, result=str(item_result.result))
-                    result_list.append(sync_result)
+        try:
+            group = root.ncs__devices.device_group[clean_group_name]
+        except KeyError:
+            raise ValueError(f"The device group {clean_group_name} could not be found in NSO CDB")
 
-                return result_list
+        return group.device_name.as_list()
 
 @mcp.tool()
 async def get_devices_from_device_group(device_group_name: str) -> list[str]:
@@ -216,16 +336,14 @@ async def get_devices_from_device_group(device_group_name: str) -> list[str]:
     Returns:
         list[str]: A list of network devices from the NSO server.
     """
-    logger.info(f"Getting devices list from device group {device_group_name.strip()}")
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        if root.ncs__devices.device_group.exists(device_group_name.strip()):
-            group = root.devices.device_group[device_group_name.strip()]
-            return group.device_name.as_list()
-        else:
-            raise ValueError(f"The device group {device_group_name.strip()} could not be found in NSO CDB")
-    
+    return await asyncio.to_thread(_sync_get_devices_from_device_group, device_group_name)
+
+def _sync_get_devices_list_per_model(model: str) -> list[DeviceInfo]:
+    clean_model = model.strip().lower()
+    logger.info("Getting devices list per model %s", clean_model)
+    xpath = f"/ncs:devices/device[{xpath_contains_lower('platform/name', clean_model)}]"
+    with config.read_trans() as read_trans:
+        return [build_device_info_from_row(row) for row in iter_query_rows(read_trans, xpath, DEVICE_INFO_SELECT)]
 
 @mcp.tool()
 async def get_devices_list_per_model(model: str) -> list[DeviceInfo]:
@@ -238,18 +356,16 @@ async def get_devices_list_per_model(model: str) -> list[DeviceInfo]:
     Returns:
         list[DeviceInfo]: A list of network devices information from the NSO server
     """
+    return await asyncio.to_thread(_sync_get_devices_list_per_model, model)
+
+def _sync_get_devices_list_per_model_and_version(model: str, version: str) -> list[DeviceInfo]:
     clean_model = model.strip().lower()
-    logger.info(f"Getting devices list per model {clean_model}")
-    devices_name_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        for device in root.devices.device:
-            if clean_model in device.platform.name.lower():
-                device_info = build_device_info(device)
-                devices_name_list.append(device_info)
-    
-    return devices_name_list
+    clean_version = version.strip().lower()
+    logger.info("Getting devices list per model %s and version %s", clean_model, clean_version)
+    xpath = (f"/ncs:devices/device[{xpath_contains_lower('platform/name', clean_model)}"
+             f" and {xpath_contains_lower('platform/version', clean_version)}]")
+    with config.read_trans() as read_trans:
+        return [build_device_info_from_row(row) for row in iter_query_rows(read_trans, xpath, DEVICE_INFO_SELECT)]
 
 @mcp.tool()
 async def get_devices_list_per_model_and_version(model: str, version: str) -> list[DeviceInfo]:
@@ -263,19 +379,16 @@ async def get_devices_list_per_model_and_version(model: str, version: str) -> li
     Returns:
         list[DeviceInfo]: A list of network devices information from the NSO server
     """
+    return await asyncio.to_thread(_sync_get_devices_list_per_model_and_version, model, version)
+
+def _sync_get_devices_list_per_model_dont_match_version(model: str, version: str) -> list[DeviceInfo]:
     clean_model = model.strip().lower()
     clean_version = version.strip().lower()
-    logger.info(f"Getting devices list per model {clean_model} and version {clean_version}")
-    devices_name_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        for device in root.devices.device:
-            if clean_model in device.platform.name.lower() and clean_version in device.platform.version.lower():
-                device_info = build_device_info(device)
-                devices_name_list.append(device_info)
-    
-    return devices_name_list
+    logger.info("Getting devices list per model %s and version not%s", clean_model, clean_version)
+    xpath = (f"/ncs:devices/device[{xpath_contains_lower('platform/name', clean_model)}"
+             f" and not({xpath_contains_lower('platform/version', clean_version)})]")
+    with config.read_trans() as read_trans:
+        return [build_device_info_from_row(row) for row in iter_query_rows(read_trans, xpath, DEVICE_INFO_SELECT)]
 
 @mcp.tool()
 async def get_devices_list_per_model_dont_match_version(model: str, version: str) -> list[DeviceInfo]:
@@ -290,64 +403,49 @@ async def get_devices_list_per_model_dont_match_version(model: str, version: str
     Returns:
         list[DeviceInfo]: A list of network devices information from the NSO server
     """
-    clean_model = model.strip().lower()
-    clean_version = version.strip().lower()
-    logger.info(f"Getting devices list per model {clean_model} and version not{clean_version}")
-    devices_name_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        for device in root.devices.device:
-            if clean_model in device.platform.name.lower() and not clean_version in device.platform.version.lower():
-                device_info = build_device_info(device)
-                devices_name_list.append(device_info)
-    
-    return devices_name_list
+    return await asyncio.to_thread(_sync_get_devices_list_per_model_dont_match_version, model, version)
+
+@ttl_cache(config.cache_ttl)
+def _sync_get_day1_services() -> list[str]:
+    logger.info("Getting day1 services")
+    with config.read_trans() as t:
+        root = ncs.maagic.get_root(t)
+
+        return [strip_prefix(service).strip() for service in root.ncs__services if DAY1_TEMPLATE in service]
 
 @mcp.tool()
 async def get_day1_services() -> list[str]:
     """
     Get a list of day1 services from the NSO server.
     """
-    DAY1_TEMPLATE = "-day1-"
-    logger.info(f"Getting day1 services")
-    list_results = []
+    return await asyncio.to_thread(_sync_get_day1_services)
 
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as t:
+def _sync_get_all_services() -> list[str]:
+    logger.info("Getting day1 services")
+    with config.read_trans() as t:
         root = ncs.maagic.get_root(t)
 
-        for service in root.ncs__services:
-            if DAY1_TEMPLATE in service:
-                split_output = service.split(":", 1)
-                
-                if len(split_output) == 2:
-                   list_results.append(split_output[1].strip())
-                else:
-                    list_results.append(service)
-
-    return list_results
-
+        return [strip_prefix(service).strip() for service in root.ncs__services]
 
 @mcp.tool()
 async def get_all_services() -> list[str]:
     """
     Get a list of all services from the NSO server.
     """
-    logger.info(f"Getting day1 services")
-    list_results = []
+    return await asyncio.to_thread(_sync_get_all_services)
 
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as t:
-        root = ncs.maagic.get_root(t)
+def _sync_get_device_configured_services(device_name: str) -> list[str]:
+    clean_name = device_name.strip()
+    logger.info("Getting services for device %s", clean_name)
+    with config.read_trans() as read_trans:
+        root = ncs.maagic.get_root(read_trans)
 
-        for service in root.ncs__services:
-            split_output = service.split(":", 1)
-            
-            if len(split_output) == 2:
-                list_results.append(split_output[1].strip())
-            else:
-                list_results.append(service)
+        try:
+            device = root.ncs__devices.device[clean_name]
+        except KeyError:
+            raise ValueError(f'Device {clean_name} not found in NSO CDB')
 
-    return list_results
+        return device.service_list.as_list()
 
 @mcp.tool()
 async def get_device_configured_services(device_name: str) -> list[str]:
@@ -357,19 +455,31 @@ async def get_device_configured_services(device_name: str) -> list[str]:
     Returns:
         list[str]: a list of services NSO xpath
     """
-    logger.info(f"Getting services for device {device_name.strip()}")
-    service_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        
-        if not device_name.strip() in root.ncs__devices.device:
-            raise ValueError(f'Device {device_name.strip()} not found in NSO CDB')
+    return await asyncio.to_thread(_sync_get_device_configured_services, device_name)
 
-        for service in root.devices.device[device_name.strip()].service_list:
-            service_list.append(service)
-    
-    return service_list
+def _sync_check_service_sync_status(ncs_keypath: str) -> str:
+    logger.info("Checking sync status for service %s", ncs_keypath)
+    with config.read_trans() as read_trans:
+        # Call the check-sync action directly, skipping the maagic schema walk
+        try:
+            output = read_trans.maapi.request_action_th(read_trans.th, [], f"{ncs_keypath.rstrip('/')}/check-sync")
+        except _ncs.error.Error as e:
+            # Only a keypath MAAPI can't parse goes through maagic, any other error comes from the action itself
+            if e.confd_errno != ncs.ERR_BADPATH:
+                raise
+
+            logger.info("Keypath %s not resolved by MAAPI, retrying through maagic", ncs_keypath)
+        else:
+            for tag_value in output:
+                if _ncs.hash2str(tag_value.tag) == "in-sync":
+                    return str(tag_value.v.as_pyval())
 
+            raise ValueError(f"check-sync on {ncs_keypath} returned no in-sync result")
+
+        root = ncs.maagic.get_root(read_trans)
+        service = ncs.maagic.get_node(root, ncs_keypath)
+        result = service.check_sync()
+        return str(result.in_sync)
 
 @mcp.tool()
 async def check_service_sync_status(ncs_keypath: str) -> str:
@@ -379,16 +489,20 @@ async def check_service_sync_status(ncs_keypath: str) -> str:
     Returns:
         str: if the service is in-sync or not 
     """
-    logger.info(f"Checking sync status for service {ncs_keypath}")
-    service_list = []
-    with ncs.maapi.single_read_trans(config.nso_user, config.nso_context, ip=config.nso_addresss) as read_trans:
-        root = ncs.maagic.get_root(read_trans)
-        service = ncs.maagic.get_node(root, ncs_keypath)
-        result = service.check_sync()
-        return str(result.in_sync)
+    return await asyncio.to_thread(_sync_check_service_sync_status, ncs_keypath)
 
 
 # Run the server
 if __name__ == "__main__":
-    logger.info(f"Starting NSO MCP server with Streamable HTTP transport in port {config.api_port}")
-    mcp.run(transport="streamable-http")
+    logger.info("Starting NSO MCP server with Streamable HTTP transport in port %s", config.api_port)
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop")
+
+    try:
+        mcp.run(transport="streamable-http")
+    finally:
+        write_executor.shutdown()
+        config.close()
@@ -1,15 +1,23 @@
 import ncs
+import functools
+import threading
+import time
 
-from pydantic import BaseModel, Field
-from typing import List
+from contextlib import closing
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Callable, Iterator, List
 
 
 class SyncResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(description="The name of the network device")
     result: str = Field(description="Sync operation result")
 
 
 class DeviceInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(description="The name of the network device")
     address: str = Field(description="The address of the network device")
     platform_version: str = Field(description="The software version of the network device")
@@ -19,6 +27,44 @@ class DeviceInfo(BaseModel):
     ned: str = Field(description="NED (Network Element Driver) used by NSO to connect to device")
 
 
+# Leaves fetched per device when building DeviceInfo from a MAAPI query, in DeviceInfo field order
+DEVICE_INFO_SELECT = [
+    "name",
+    "address",
+    "platform/version",
+    "platform/name",
+    "platform/model",
+    "device-type/netconf/ned-id",
+    "device-type/cli/ned-id",
+]
+
+QUERY_CHUNK_SIZE = 500
+
+# translate() tables used for case-insensitive XPath matching (XPath 1.0 has no lower-case())
+_UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_LOWER = "abcdefghijklmnopqrstuvwxyz"
+
+
+def iter_query_rows(trans: ncs.maapi.Transaction, xpath: str, select: List[str], context_node: str = "/") -> Iterator[tuple]:
+    """
+    Run a MAAPI query and yield the selected leaves of every matching node.
+    Rows are fetched from NSO in chunks as the iterator is consumed, so it
+    must be consumed while the transaction is open.
+
+    Args:
+        trans (ncs.maapi.Transaction): open NSO transaction
+        xpath (str): XPath expression selecting the nodes (e.g. /ncs:devices/device)
+        select (List[str]): leaves to fetch, relative to each selected node
+        context_node (str): keypath the XPath expression is evaluated from
+
+    Yields:
+        tuple: string values of one node, in select order
+    """
+    with ncs.maapi.Query(trans, xpath, context_node, select, chunk_size=QUERY_CHUNK_SIZE, result_as=ncs.QUERY_STRING) as query:
+        for row in query:
+            yield tuple(row)
+
+
 def build_device_info(device: ncs.maagic.ListElement) -> DeviceInfo:
     """
     Build device information for a device from NSO
@@ -37,29 +83,147 @@ def build_device_info(device: ncs.maagic.ListElement) -> DeviceInfo:
             - ned: NED (Network Element Driver) used by NSO to connect to device
     """
 
-    if device.device_type.netconf.ned_id:
+    # Read all leaves with one query on the device node instead of one MAAPI call per leaf
+    trans = ncs.maagic.get_trans(device)
+    with closing(iter_query_rows(trans, ".", DEVICE_INFO_SELECT, context_node=device._path)) as rows:
+        row = next(rows, None)
+
+    if row is None:
+        raise ValueError(f"Device {device.name} not found in NSO CDB")
+
+    return build_device_info_from_row(row)
+
+
+def xpath_literal(value: str) -> str:
+    """
+    Quote a string as an XPath 1.0 literal
+
+    Args:
+        value (str): string to quote
+
+    Returns:
+        str: XPath literal, using concat() when the value holds both quote types
+    """
+    if "'" not in value:
+        return f"'{value}'"
+
+    if '"' not in value:
+        return f'"{value}"'
+
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+def xpath_contains_lower(leaf: str, value: str) -> str:
+    """
+    Build an XPath expression checking that a leaf contains value, ignoring case
+
+    Args:
+        leaf (str): leaf path relative to the context node (e.g. platform/name)
+        value (str): lower-case string to look for
+
+    Returns:
+        str: XPath boolean expression
+    """
+    return f"contains(translate({leaf}, '{_UPPER}', '{_LOWER}'), {xpath_literal(value)})"
+
+
+def build_device_info_from_row(row: tuple) -> DeviceInfo:
+    """
+    Build device information from a query row fetched with DEVICE_INFO_SELECT.
+    Values are already typed NSO data, so the model is created without validation.
+
+    Args:
+        row (tuple): leaf values of one device, in DEVICE_INFO_SELECT order
+
+    Returns:
+        DeviceInfo with the device's information
+    """
+    name, address, platform_version, platform_name, platform_model, netconf_ned_id, cli_ned_id = row
+    ned_type, ned = get_ned(netconf_ned_id, cli_ned_id)
+
+    return DeviceInfo.model_construct(
+        name=name,
+        address=address or '',
+        platform_version=platform_version or '',
+        platform_name=platform_name or '',
+        platform_model=platform_model or '',
+        ned_type=ned_type,
+        ned=ned
+    )
+
+
+def get_ned(netconf_ned_id: str, cli_ned_id: str) -> tuple[str, str]:
+    """
+    Get the NED type and NED name from the device-type ned-id leaves
+
+    Args:
+        netconf_ned_id (str): device-type/netconf/ned-id value
+        cli_ned_id (str): device-type/cli/ned-id value
+
+    Returns:
+        tuple[str, str]: NED type (netconf, cli or unknown) and NED name without prefix
+    """
+    if netconf_ned_id:
         ned_type = 'netconf'
-        ned = device.device_type.netconf.ned_id
+        ned = netconf_ned_id
 
-    elif device.device_type.cli.ned_id:
+    elif cli_ned_id:
         ned_type = 'cli'
-        ned = device.device_type.cli.ned_id
+        ned = cli_ned_id
 
     else:
         ned_type = 'unknown'
         ned = 'unknown'
 
-    if len(ned.split(':')) == 2:
-        ned = ned.split(':')[1]
+    return ned_type, strip_prefix(ned)
 
-    result = DeviceInfo(
-        name=device.name,
-        address=device.address,
-        platform_version=device.platform.version, 
-        platform_name=device.platform.name,
-        platform_model=device.platform.model,
-        ned_type=ned_type,
-        ned=ned
-    )
 
-    return result
\ No newline at end of file
+def strip_prefix(value: str) -> str:
+    """
+    Remove the YANG module prefix from a value (e.g. 'ned:netconf' -> 'netconf')
+
+    Args:
+        value (str): value with an optional 'prefix:' part
+
+    Returns:
+        str: value without the prefix
+    """
+    _, separator, name = value.partition(':')
+    return name if separator else value
+
+
+def ttl_cache(ttl: float) -> Callable:
+    """
+    Cache the list returned by a function without arguments for ttl seconds
+
+    Args:
+        ttl (float): number of seconds a result is reused, 0 disables the cache
+
+    Returns:
+        Callable: decorator; the wrapped function gets a cache_clear() method
+    """
+    def decorator(func: Callable[[], list]) -> Callable[[], list]:
+        lock = threading.Lock()
+        cache = {}
+
+        @functools.wraps(func)
+        def wrapper() -> list:
+            with lock:
+                if cache and time.monotonic() - cache["time"] < ttl:
+                    return list(cache["value"])
+
+                value = func()
+                if ttl > 0:
+                    cache["value"], cache["time"] = value, time.monotonic()
+
+                return list(value)
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator